@@ -1,47 +1,69 @@
 # This script compares the time it takes to generate the moves for a given list of FEN positions using Chessnut and Chessir.
 # Note that it is necessary to install Chessnut for this script to work.
+#
+# Each position is timed with time.perf_counter_ns() over several runs (after a
+# few untimed warmup runs), with garbage collection disabled, and the fastest
+# run is kept for each position. The libraries alternate which goes first on
+# each run. The totals, medians, and interquartile ranges of the per-position
+# times are printed. Chessir's caches (of moves, and of FEN conversions) are
+# cleared before each timed call, so they don't hide the cost of parsing the
+# FEN and generating the moves.
 
 from Chessnut import Game as ChessnutGame
+from src.Chessir.board import Board
 from src.Chessir.game import Game
+import gc
+import statistics
 import time
 
-def time_moves(fen_list):
+def time_call(func, fen):
+    """Return the time in nanoseconds taken by func(fen)."""
+    start_time = time.perf_counter_ns()
+    func(fen)
+    return time.perf_counter_ns() - start_time
 
-    runs = 10
-    chessnut_time = 0
-    chessir_time = 0
+def chessnut_moves(fen):
+    return ChessnutGame(fen).get_moves()
 
-    for run in range(runs):
-        if run % 2 == 0: chessnut_first = True
-        else: chessnut_first = False    
-        for fen in fen_list:
-            if chessnut_first:
-                start_time = time.time()
-                game = ChessnutGame(fen)
-                moves = game.get_moves()
-                end_time = time.time()
-                chessnut_time += end_time - start_time
+def chessir_moves(fen):
+    return Game(fen, track_history=False).get_moves()
 
-                start_time = time.time()
-                game = Game(fen)
-                moves = game.get_moves()
-                end_time = time.time()
-                chessir_time += end_time - start_time
-            else:
-                start_time = time.time()
-                game = Game(fen)
-                moves = game.get_moves()
-                end_time = time.time()
-                chessir_time += end_time - start_time
+def clear_chessir_caches():
+    Game.clear_moves_cache()
+    Board.clear_caches()
 
-                start_time = time.time()
-                game = ChessnutGame(fen)
-                moves = game.get_moves()
-                end_time = time.time()
-                chessnut_time += end_time - start_time
+def print_summary(name, times):
+    q1, median, q3 = statistics.quantiles(times, n=4)
+    print(f'{name} time: total {sum(times) / 1e6:.3f} ms, '
+          f'median {median / 1e3:.1f} us, IQR {(q3 - q1) / 1e3:.1f} us per position')
 
-    print('Chessnut time:', chessnut_time)
-    print('Chessir time:', chessir_time)
+def time_moves(fen_list, runs=10, warmup_runs=2):
+
+    # Chessir caches the moves and parsed FEN strings of positions it has
+    # seen; its caches are cleared (outside the timed call) so that every run
+    # measures parsing and move generation rather than cache hits
+    libraries = [('Chessnut', chessnut_moves, None),
+                 ('Chessir', chessir_moves, clear_chessir_caches)]
+    # best (minimum) time for each library for each position
+    best_times = {name: [float('inf')] * len(fen_list) for name, _, _ in libraries}
+
+    gc.collect()
+    gc.disable()
+    try:
+        for run in range(warmup_runs + runs):
+            order = libraries if run % 2 == 0 else libraries[::-1]
+            for i, fen in enumerate(fen_list):
+                for name, func, setup in order:
+                    if setup is not None:
+                        setup()
+                    elapsed = time_call(func, fen)
+                    if run >= warmup_runs:
+                        best_times[name][i] = min(best_times[name][i], elapsed)
+    finally:
+        gc.enable()
+
+    for name, _, _ in libraries:
+        print_summary(name, best_times[name])
 
 test_fens = [
     # Kasparov vs Topalov 1999
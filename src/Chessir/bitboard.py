@@ -0,0 +1,202 @@
+"""
+Precomputed bitboard tables used by `Board` and `square_attacked`.
+
+A bitboard is a Python int whose bits represent the 64 squares of a chess
+board. The square with raster-style index `idx` (i.e., 'a8'=0, 'h8'=7,
+'a7'=8,...'h1'=63, the same indexing used by MOVES) is represented by the
+bit `1 << idx`, so the index of the lowest set bit of a bitboard is
+`(bb & -bb).bit_length() - 1` and the index of the highest set bit is
+`bb.bit_length() - 1` (see lsb, msb, and popcount).
+
+`Board.bb` is a list of 14 bitboards: one for each of the 12 types of piece
+(indexed by PIECE_INDEX) followed by the occupancy of the white pieces
+(index WHITE) and of the black pieces (index BLACK).
+
+The attack tables are indexed by square:
+
+KNIGHT_ATTACKS[<square index>] = bitboard of squares a knight attacks
+
+KING_ATTACKS[<square index>] = bitboard of squares a king attacks
+
+PAWN_ATTACKS[<color>][<square index>] = bitboard of squares attacked by a
+pawn of that color ('w' or 'b') standing on the square
+
+RAY_MASKS[<square index> * 8 + <direction>] = bitboard of the squares along
+a ray from the square to the edge of the board (excluding the square itself)
+
+RAY_SQUARES[<square index> * 8 + <direction>] = tuple of the same squares,
+sorted by increasing distance from the square
+
+The ray tables are flat tuples so that the 8 rays of a square sit next to
+each other and a ray is found with a single subscript.
+
+The tables of pairs of squares are indexed by both squares, and are 0 when
+the squares do not share a rank, file, or diagonal:
+
+BETWEEN[<square index>][<square index>] = bitboard of the squares strictly
+between the two squares
+
+LINE[<square index>][<square index>] = bitboard of the whole line (from edge
+to edge of the board) through the two squares
+
+Sliding piece attacks are looked up rather than traced along rays. For each
+square, ROOK_MASKS and BISHOP_MASKS hold the squares whose occupancy can
+block the piece (the edge square of each ray never blocks anything beyond
+it, so it is left out), and ROOK_ATTACKS and BISHOP_ATTACKS map every
+subset of that mask to the bitboard of attacked squares. This is the same
+idea as "magic" or PEXT bitboards, with the Python dict taking the place of
+the magic hash:
+
+rook_attacks(idx, occupied) == ROOK_ATTACKS[idx][occupied & ROOK_MASKS[idx]]
+"""
+
+PIECE_INDEX = {'P': 0, 'N': 1, 'B': 2, 'R': 3, 'Q': 4, 'K': 5,
+               'p': 6, 'n': 7, 'b': 8, 'r': 9, 'q': 10, 'k': 11}
+WHITE = 12
+BLACK = 13
+OCCUPANCY = {'w': WHITE, 'b': BLACK}
+
+# Ray directions; STEPS gives the change in square index for one step in
+# each direction. Rays in POSITIVE_DIRECTIONS move toward higher square
+# indices, so the nearest piece on such a ray is its lowest set bit.
+N, NE, E, SE, S, SW, W, NW = range(8)
+STEPS = (-8, -7, 1, 9, 8, 7, -1, -9)
+POSITIVE_DIRECTIONS = (E, SE, S, SW)
+ORTHOGONAL_DIRECTIONS = (N, E, S, W)
+DIAGONAL_DIRECTIONS = (NE, SE, SW, NW)
+
+# (dx, dy) for one step in each direction, where y increases toward rank 8
+_DELTAS = ((0, 1), (1, 1), (1, 0), (1, -1),
+           (0, -1), (-1, -1), (-1, 0), (-1, 1))
+
+
+def lsb(bb):
+    """Return the index of the lowest set bit of a non-empty bitboard."""
+    return (bb & -bb).bit_length() - 1
+
+
+def msb(bb):
+    """Return the index of the highest set bit of a non-empty bitboard."""
+    return bb.bit_length() - 1
+
+
+def popcount(bb):
+    """Return the number of set bits of a bitboard."""
+    return bin(bb).count('1')
+
+
+def _offsets_mask(idx, offsets):
+    """
+    Return a bitboard of the squares reached from idx by each (dx, dy) in
+    offsets, ignoring any that fall off the board.
+    """
+    x, y = idx % 8, 7 - idx // 8
+    mask = 0
+    for dx, dy in offsets:
+        if 0 <= x + dx < 8 and 0 <= y + dy < 8:
+            mask |= 1 << ((7 - (y + dy)) * 8 + x + dx)
+    return mask
+
+
+KNIGHT_ATTACKS = tuple(_offsets_mask(idx, ((1, 2), (2, 1), (2, -1), (1, -2),
+                                           (-1, -2), (-2, -1), (-2, 1), (-1, 2)))
+                       for idx in range(64))
+
+KING_ATTACKS = tuple(_offsets_mask(idx, _DELTAS) for idx in range(64))
+
+# white pawns move toward rank 8 and black pawns move toward rank 1
+PAWN_ATTACKS = {
+    'w': tuple(_offsets_mask(idx, ((-1, 1), (1, 1))) for idx in range(64)),
+    'b': tuple(_offsets_mask(idx, ((-1, -1), (1, -1))) for idx in range(64)),
+}
+
+_ray_squares = []
+for idx in range(64):
+    for dx, dy in _DELTAS:
+        x, y = idx % 8, 7 - idx // 8
+        squares = []
+        while 0 <= x + dx < 8 and 0 <= y + dy < 8:
+            x, y = x + dx, y + dy
+            squares.append((7 - y) * 8 + x)
+        _ray_squares.append(tuple(squares))
+RAY_SQUARES = tuple(_ray_squares)
+RAY_MASKS = tuple(sum(1 << i for i in squares) for squares in RAY_SQUARES)
+
+_between = [[0] * 64 for _ in range(64)]
+_line = [[0] * 64 for _ in range(64)]
+for idx in range(64):
+    for direction in range(8):
+        line = (RAY_MASKS[idx * 8 + direction] |
+                RAY_MASKS[idx * 8 + (direction + 4) % 8] | 1 << idx)
+        between = 0
+        for end in RAY_SQUARES[idx * 8 + direction]:
+            _between[idx][end] = between
+            _line[idx][end] = line
+            between |= 1 << end
+BETWEEN = tuple(tuple(row) for row in _between)
+LINE = tuple(tuple(row) for row in _line)
+
+
+def _subsets(mask):
+    """Yield every subset of the bits of mask (Carry-Rippler enumeration)."""
+    subset = 0
+    while True:
+        yield subset
+        subset = (subset - mask) & mask
+        if not subset:
+            return
+
+
+def _slider_tables(directions):
+    """
+    Return the blocker masks and the attack lookup tables for a sliding piece
+    that moves along the given directions.
+    """
+    masks = []
+    tables = []
+    for idx in range(64):
+        mask = 0
+        for direction in directions:
+            for i in RAY_SQUARES[idx * 8 + direction][:-1]:
+                mask |= 1 << i
+        table = {}
+        unique = {}  # share int objects between identical attack sets
+        for occupied in _subsets(mask):
+            attacks = 0
+            for direction in directions:
+                for i in RAY_SQUARES[idx * 8 + direction]:
+                    attacks |= 1 << i
+                    if occupied >> i & 1:
+                        break
+            table[occupied] = unique.setdefault(attacks, attacks)
+        masks.append(mask)
+        tables.append(table)
+    return tuple(masks), tuple(tables)
+
+
+ROOK_MASKS, ROOK_ATTACKS = _slider_tables(ORTHOGONAL_DIRECTIONS)
+BISHOP_MASKS, BISHOP_ATTACKS = _slider_tables(DIAGONAL_DIRECTIONS)
+
+
+def knight_attacks(idx, occupied=0):
+    """
+    Return the bitboard of squares attacked by a knight at idx (which does
+    not depend on the occupancy of the board).
+    """
+    return KNIGHT_ATTACKS[idx]
+
+
+def rook_attacks(idx, occupied):
+    """Return the bitboard of squares attacked by a rook at idx."""
+    return ROOK_ATTACKS[idx][occupied & ROOK_MASKS[idx]]
+
+
+def bishop_attacks(idx, occupied):
+    """Return the bitboard of squares attacked by a bishop at idx."""
+    return BISHOP_ATTACKS[idx][occupied & BISHOP_MASKS[idx]]
+
+
+def queen_attacks(idx, occupied):
+    """Return the bitboard of squares attacked by a queen at idx."""
+    return (ROOK_ATTACKS[idx][occupied & ROOK_MASKS[idx]] |
+            BISHOP_ATTACKS[idx][occupied & BISHOP_MASKS[idx]])
@@ -4,63 +4,179 @@ Forsyth-Edwards Notation (FEN). This class is only used internally by the
 `Game` class.
 """
 
+from functools import lru_cache
+from random import Random
+
+from .bitboard import PIECE_INDEX, WHITE, BLACK
+
+# Zobrist keys: a fixed random 64-bit number for each type of piece on each
+# square; the Zobrist key of a position is the XOR of the numbers of all of
+# its pieces, so it can be updated incrementally as pieces move.
+_rng = Random(0xC4E55)
+ZOBRIST = tuple(tuple(_rng.getrandbits(64) for _ in range(64)) for _ in range(12))
+
+# Translation table that expands a FEN piece placement string to one
+# character per square
+_EXPAND_FEN = {ord('/'): None}
+_EXPAND_FEN.update({ord(str(n)): ' ' * n for n in range(1, 9)})
+
+# Owner ('w', 'b', or None) of each piece symbol (or blank space)
+_OWNER = {piece: 'w' if piece.isupper() else 'b' for piece in PIECE_INDEX}
+_OWNER[' '] = None
+
+
+@lru_cache(maxsize=4096)
+def _encode_rank(squares):
+    """
+    Convert the 8 squares of a rank (a string with a blank space for each
+    empty square) to its FEN notation, e.g., 'r   k  r' -> 'r3k2r'.
+    """
+    pos = []
+    for piece in squares:
+        # blank spaces must be converted to numbers in the final FEN
+        if piece != ' ':
+            pos.append(piece)
+        elif pos and pos[-1].isdigit():
+            pos[-1] = str(int(pos[-1]) + 1)
+        else:
+            pos.append('1')
+    return ''.join(pos)
+
+
+@lru_cache(maxsize=256)
+def _parse_position(position):
+    """
+    Parse a FEN piece placement string into the squares of the board (a
+    string with one character per square), a tuple of its bitboards, its
+    Zobrist key, and the indices of the kings. The result is cached, and must
+    be copied before it is modified.
+    """
+    # drop the row separators and replace numbers with that number of
+    # spaces
+    squares = position.translate(_EXPAND_FEN)
+
+    bb = [0] * 14
+    zkey = 0
+    for idx, piece in enumerate(squares):
+        if piece != ' ':
+            piece_index = PIECE_INDEX[piece]
+            bb[piece_index] |= 1 << idx
+            zkey ^= ZOBRIST[piece_index][idx]
+    bb[WHITE] = bb[0] | bb[1] | bb[2] | bb[3] | bb[4] | bb[5]
+    bb[BLACK] = bb[6] | bb[7] | bb[8] | bb[9] | bb[10] | bb[11]
+    return squares, tuple(bb), zkey, (squares.find('K'), squares.find('k'))
+
 
 class Board(object):
     """
     This class manages the position of all pieces in a chess game. The
-    position is stored as a list of single-character strings.
+    position is stored as a list of single-character strings, and as a list
+    of bitboards (see the `bitboard` module) that is kept in step with it.
+    The Zobrist key of the position is kept in `zkey`, the indices of the
+    white and black kings are kept in `king_sq`, and the FEN string of the
+    position is cached in `_fen` until a piece is moved. The FEN of each rank
+    is also cached in `_ranks`, so that only the ranks on which pieces have
+    moved are converted again.
     """
 
+    __slots__ = ('_position', 'bb', 'zkey', '_fen', '_ranks', 'king_sq')
+
     def __init__(self, position=' ' * 64):
         self._position = []
+        self.bb = [0] * 14
+        self.zkey = 0
+        self._fen = None
+        self._ranks = [None] * 8
+        self.king_sq = [-1, -1]
         self.set_position(position)
 
     def __str__(self):
         """
         Convert the piece placement array to a FEN string.
         """
-        pos = []
-        for idx, piece in enumerate(self._position):
+        if self._fen is not None:
+            return self._fen
+        ranks = self._ranks
+        for row in range(8):
+            if ranks[row] is None:
+                ranks[row] = _encode_rank(''.join(self._position[row * 8:row * 8 + 8]))
+        self._fen = '/'.join(ranks)
+        return self._fen
+
+    def __copy__(self):
+        return self.clone()
 
-            # add a '/' at the end of each row
-            if idx > 0 and idx % 8 == 0:
-                pos.append('/')
+    def __deepcopy__(self, memo):
+        return self.clone()
+
+    @staticmethod
+    def clear_caches():
+        """
+        Discard the cached conversions of FEN piece placements to boards and
+        of ranks to FEN strings, which are shared by all boards.
+        """
+        _parse_position.cache_clear()
+        _encode_rank.cache_clear()
 
-            # blank spaces must be converted to numbers in the final FEN
-            if not piece.isspace():
-                pos.append(piece)
-            elif pos and pos[-1].isdigit():
-                pos[-1] = str(int(pos[-1]) + 1)
-            else:
-                pos.append('1')
-        return ''.join(pos)
+    def clone(self):
+        """
+        Return an independent copy of the board. This copies the fixed set of
+        attributes directly, which is much faster than `copy.deepcopy`.
+        """
+        board = Board.__new__(Board)
+        board._position = self._position[:]
+        board.bb = self.bb[:]
+        board.zkey = self.zkey
+        board.king_sq = self.king_sq[:]
+        board._fen = self._fen
+        board._ranks = self._ranks[:]
+        return board
 
     def set_position(self, position):
         """
         Convert a FEN position string into a piece placement array.
         """
-        self._position = []
-        for char in position:
-            if char == '/':  # skip row separator character
-                continue
-            elif char.isdigit():
-                # replace numbers characters with that number of spaces
-                self._position.extend([' '] * int(char))
-            else:
-                self._position.append(char)
+        squares, bb, zkey, king_sq = _parse_position(position)
+        self._position = list(squares)
+        self.bb = list(bb)
+        self.zkey = zkey
+        self._fen = None
+        self._ranks = [None] * 8
+        self.king_sq = list(king_sq)
 
     def get_piece(self, index):
         """Get the piece at the given index in the position array."""
         return self._position[index]
 
+    def set_piece(self, index, piece):
+        """
+        Place a piece (or a blank space) at the given index in the position
+        array, replacing whatever was there, and update the bitboards and the
+        Zobrist key.
+        """
+        bit = 1 << index
+        old = self._position[index]
+        if old != ' ':
+            self.bb[PIECE_INDEX[old]] ^= bit
+            self.bb[WHITE if old.isupper() else BLACK] ^= bit
+            self.zkey ^= ZOBRIST[PIECE_INDEX[old]][index]
+        if piece != ' ':
+            self.bb[PIECE_INDEX[piece]] |= bit
+            self.bb[WHITE if piece.isupper() else BLACK] |= bit
+            self.zkey ^= ZOBRIST[PIECE_INDEX[piece]][index]
+            if piece == 'K':
+                self.king_sq[0] = index
+            elif piece == 'k':
+                self.king_sq[1] = index
+        self._position[index] = piece
+        self._fen = None
+        self._ranks[index >> 3] = None
+
     def get_owner(self, index):
         """
         Get the owner of the piece at the given index in the position array.
         """
-        piece = self.get_piece(index)
-        if not piece.isspace():
-            return 'w' if piece.isupper() else 'b'
-        return None
+        return _OWNER[self._position[index]]
 
     def move_piece(self, start, end, piece):
         """
@@ -68,8 +184,8 @@ class Board(object):
         to the end position. If a different piece is provided, that piece will
         be placed at the end index instead.
         """
-        self._position[end] = piece
-        self._position[start] = ' '
+        self.set_piece(end, piece)
+        self.set_piece(start, ' ')
 
     def find_piece(self, symbol):
         """
@@ -11,17 +11,81 @@ handle any chess variants (e.g., Chess960) that are not equivalent to standard
 chess rules.
 """
 
-from collections import namedtuple, Counter
+from collections import namedtuple, Counter, OrderedDict
 
 from .board import Board
-from .moves import MOVES
-
-import copy
-from .square_attacked import square_attacked
+from .bitboard import (PIECE_INDEX, WHITE, BLACK, OCCUPANCY, KING_ATTACKS,
+                       PAWN_ATTACKS, BETWEEN, LINE, popcount, knight_attacks,
+                       rook_attacks, bishop_attacks, queen_attacks)
+from .square_attacked import attackers_to, is_attacked
 
 # Define a named tuple with FEN field names to hold game state information
 State = namedtuple('State', ['player', 'rights', 'en_passant', 'ply', 'turn'])
 
+# Precompute the algebraic notation of each board index, the board index of
+# each square in algebraic notation, and the simple algebraic notation of
+# each pair of start and end indices, e.g., _MOVE_STR[52][36] == 'e2e4'
+_I2XY = tuple(chr(97 + i % 8) + str(8 - i // 8) for i in range(64))
+_XY2I = {xy: i for i, xy in enumerate(_I2XY)}
+_MOVE_STR = tuple(tuple(start + end for end in _I2XY) for start in _I2XY)
+
+# Format of a FEN string from the FEN of the board and the State fields
+_FEN_FORMAT = '%s %s %s %s %d %d'
+
+# Bitmask of all 64 squares
+_ALL_SQUARES = (1 << 64) - 1
+
+# Attacked squares lookup of each piece symbol, other than kings and pawns
+_PIECE_ATTACKS = {'Q': queen_attacks, 'R': rook_attacks, 'B': bishop_attacks,
+                  'N': knight_attacks,
+                  'q': queen_attacks, 'r': rook_attacks, 'b': bishop_attacks,
+                  'n': knight_attacks}
+
+# Castling rights that are voided by a move from or to each index
+_VOID_RIGHTS = {0: 'q', 4: 'kq', 7: 'k', 56: 'Q', 60: 'KQ', 63: 'K'}
+
+# Castling moves by the ending index of the king: the king's symbol, the
+# castling right, and the starting and ending index of the rook
+_CASTLING_ROOK = {62: ('K', 'K', 63, 61), 58: ('K', 'Q', 56, 59),
+                  6: ('k', 'k', 7, 5), 2: ('k', 'q', 0, 3)}
+
+# Indices in Board.bb of the bitboards of each type of piece
+_P, _N, _B, _R, _Q, _K, _p, _n, _b, _r, _q, _k = (PIECE_INDEX[piece]
+                                                  for piece in 'PNBRQKpnbrqk')
+
+# Indices in Board.bb of the queens, rooks, and bishops of the opponent of
+# each player
+_SLIDER_INDICES = {'w': (_q, _r, _b), 'b': (_Q, _R, _B)}
+
+# Symbols of each player's pieces other than the king
+_PLAYER_PIECES = {'w': 'QRBNP', 'b': 'qrbnp'}
+
+# Castling moves of each player: the starting and ending index of the king,
+# the castling right, and the bitmask of the squares that must be empty
+_CASTLING = {'w': ((60, 62, 'K', 1 << 61 | 1 << 62),
+                   (60, 58, 'Q', 1 << 59 | 1 << 58 | 1 << 57)),
+             'b': ((4, 6, 'k', 1 << 5 | 1 << 6),
+                   (4, 2, 'q', 1 << 3 | 1 << 2 | 1 << 1))}
+
+# Cache of the moves of positions seen by any game, keyed by the Zobrist key
+# of the board and the state fields that affect which moves are legal; the
+# least recently used entries are discarded when the cache holds
+# Game.moves_cache_size entries. It is emptied by Game.clear_moves_cache().
+_MOVES_CACHE = OrderedDict()
+
+
+def _index_mask(idx_list):
+    """
+    Return the bitmask of the board indices in idx_list. The indices are read
+    only once, so idx_list may be any iterable (e.g., a generator).
+    """
+    if idx_list == range(64):
+        return _ALL_SQUARES
+    mask = 0
+    for idx in idx_list:
+        mask |= 1 << idx
+    return mask
+
 
 class InvalidMove(Exception):
     """
@@ -39,6 +103,10 @@ class Game(object):
     of the `State` namedtuple class.
     """
 
+    __slots__ = ('board', 'state', 'move_history', '_history', '_fen_history',
+                 'moves', 'position_keys', 'track_history', '_status',
+                 '_repetitions', '_fen_counts', '_fen_counted')
+
     NORMAL = 0
     CHECK = 1
     CHECKMATE = 2
@@ -47,43 +115,49 @@ class Game(object):
 
     default_fen = 'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1'
 
-    def __init__(self, fen=default_fen):
+    # Greatest number of positions whose moves are cached for all games (most
+    # positions in a game are unique, so only recent ones are worth keeping);
+    # set Game.moves_cache_size to 0 to disable the cache
+    moves_cache_size = 1024
+
+    def __init__(self, fen=default_fen, track_history=True):
         """
         Initialize the game board to the supplied FEN state (or the default
         starting state if none is supplied), and determine whether to check
         the validity of moves .
+
+        If track_history is False, the FEN history and the count of each
+        position are not recorded (so threefold repetition is never detected);
+        this saves time when the game is only used to generate moves.
         """
         self.board = Board()
         self.state = State(' ', ' ', ' ', ' ', ' ')
         self.move_history = []
-        self.fen_history = []
+        self._history = []
+        self._fen_history = []
         self.moves = None
-        self.positions_count = Counter()
+        self._status = None
+        self.position_keys = Counter()
+        self._repetitions = 0
+        self._fen_counts = Counter()
+        self._fen_counted = 0
+        self.track_history = track_history
         self.set_fen(fen=fen)
 
     def __str__(self):
         """Return the current FEN representation of the game."""
-        return ' '.join(str(x) for x in [self.board] + list(self.state))
-
-    @staticmethod
-    def i2xy(pos_idx):
-        """
-        Convert a board index to algebraic notation.
-        """
-        return chr(97 + pos_idx % 8) + str(8 - pos_idx // 8)
+        return _FEN_FORMAT % ((self.board,) + self.state)
 
-    @staticmethod
-    def xy2i(pos_xy):
-        """
-        Convert algebraic notation to board index.
-        """
-        return (8 - int(pos_xy[1])) * 8 + (ord(pos_xy[0]) - ord('a'))
+    # Convert a board index to algebraic notation, and algebraic notation to
+    # a board index (the lookups are bound directly, without a wrapper)
+    i2xy = staticmethod(_I2XY.__getitem__)
+    xy2i = staticmethod(_XY2I.__getitem__)
 
     def get_fen(self):
         """
         Get the latest FEN string of the current game.
         """
-        return ' '.join(str(x) for x in [self.board] + list(self.state))
+        return _FEN_FORMAT % ((self.board,) + self.state)
 
     def set_fen(self, fen):
         """
@@ -91,16 +165,27 @@ class Game(object):
         properties, and append the FEN string to the game history *without*
         clearing it first.
         """
-        self.fen_history.append(fen)
-        fields = fen.split(' ')
-        fields[4] = int(fields[4])
-        fields[5] = int(fields[5])
-        self.state = State(*fields[1:])
-        self.board.set_position(fields[0])
-        # clear the move cache
+        position, player, rights, en_passant, ply, turn = fen.split(' ')
+        self.state = State(player, rights, en_passant, int(ply), int(turn))
+        self.board.set_position(position)
+        # clear the cached moves and status
         self.moves = None
-        # increment the position count
-        self.positions_count[fields[0]] += 1
+        self._status = None
+        if self.track_history:
+            self._history.append(fen)
+            self._count_position()
+
+    def _count_position(self):
+        """
+        Increment the count of the current board position, and the greatest
+        number of times any position has occurred.
+        """
+        key = self.board.zkey
+        # dict.get avoids Counter.__missing__ for positions not seen before
+        count = self.position_keys.get(key, 0) + 1
+        self.position_keys[key] = count
+        if count > self._repetitions:
+            self._repetitions = count
 
     def reset(self, fen=default_fen):
         """
@@ -108,21 +193,60 @@ class Game(object):
         position.
         """
         self.move_history = []
-        self.fen_history = []
+        self._history = []
+        self._fen_history = []
         self.moves = None
-        self.positions_count = Counter()
+        self._status = None
+        self.position_keys = Counter()
+        self._repetitions = 0
+        self._fen_counts = Counter()
+        self._fen_counted = 0
         self.set_fen(fen)
 
+    @property
+    def fen_history(self):
+        """
+        A list of the FEN strings of the positions in the game history. The
+        attribute is read-only, and each request returns a new list, so
+        changing the list doesn't change the game history.
+
+        Moves only record the FEN of the board and the state in the history;
+        the FEN strings of the whole game are only formatted when they are
+        requested, for the entries that have been added since the last
+        request.
+        """
+        fens = self._fen_history
+        for entry in self._history[len(fens):]:
+            fens.append(entry if entry.__class__ is str else _FEN_FORMAT % entry)
+        return fens[:]
+
+    @property
+    def positions_count(self):
+        """
+        A Counter of the number of times each board position (the piece
+        placement field of the FEN string) has occurred in the game history.
+        The attribute is read-only, and each request returns a new Counter;
+        changing it doesn't affect the game or the detection of threefold
+        repetition.
+
+        Repetitions are tracked by the Zobrist key of the board in
+        position_keys; this Counter of FEN strings is only kept up to date
+        when it is requested, by counting the entries that have been added to
+        the game history since the last request.
+        """
+        counts = self._fen_counts
+        for entry in self._history[self._fen_counted:]:
+            counts[entry[:entry.index(' ')] if entry.__class__ is str else entry[0]] += 1
+        self._fen_counted = len(self._history)
+        return counts.copy()
+
     def get_material_string(self):
         """
         Return a string listing the pieces on the board.
         """
-        material_string = ''
-        for idx in range(64):
-            piece = self.board.get_piece(idx)
-            if piece != ' ':
-                material_string += piece
-        return material_string
+        bb = self.board.bb
+        return ''.join(piece * popcount(bb[piece_index])
+                       for piece, piece_index in PIECE_INDEX.items())
 
     def apply_move(self, move, validate=False):
         """
@@ -137,11 +261,13 @@ class Game(object):
 
         If the validate parameter is set to True, the move will be checked
         for legality before it is applied to the game. If the move is
-        illegal, an `InvalidMove` exception is raised.
+        illegal, an `InvalidMove` exception is raised. Validation is off by
+        default, as checking the move requires the legal moves of the piece
+        (which costs far more than applying the move, unless the moves of
+        the position are already known); without it, the move is applied as
+        given. An `InvalidMove` exception is always raised for a move that
+        does not name two squares of the board.
         """
-        # declare the status fields using default parameters
-        fields = ['w', 'KQkq', '-', 0, 1]
-
         # gracefully handle empty or incomplete moves
         if move is None or move == '' or len(move) < 4:
             raise InvalidMove("\nIllegal move: {}\nfen: {}".format(move,
@@ -150,76 +276,118 @@ class Game(object):
         # convert to lower case to avoid casing issues
         move = move.lower()
 
-        start = Game.xy2i(move[:2])
-        end = Game.xy2i(move[2:4])
+        start = _XY2I.get(move[:2])
+        end = _XY2I.get(move[2:4])
+        if start is None or end is None:
+            raise InvalidMove("\nIllegal move: {}\nfen: {}".format(move,
+                                                                   str(self)))
         piece = self.board.get_piece(start)
         target = self.board.get_piece(end)
 
-        if validate and move not in self.get_moves(idx_list=[start]):
+        # check the move against the moves of the whole board if they are
+        # known, otherwise generate the moves of the piece being moved
+        if validate and move not in (self.moves if self.moves is not None
+                                     else self.get_moves(idx_list=[start])):
             raise InvalidMove("\nIllegal move: {}\nfen: {}".format(move,
                                                                    str(self)))
 
-        # toggle the active player
-        fields[0] = {'w': 'b', 'b': 'w'}[self.state.player]
+        state = self.state
 
         # modify castling rights - the set of castling rights that *might*
         # be voided by a move is uniquely determined by the starting index
         # of the move - regardless of what piece moves from that position
         # (excluding chess variants like chess960).
-        rights_map = {0: 'q', 4: 'kq', 7: 'k',
-                      56: 'Q', 60: 'KQ', 63: 'K'}
-        void_set = ''.join([rights_map.get(start, ''),
-                           rights_map.get(end, '')])
-        new_rights = [r for r in self.state.rights if r not in void_set]
-        fields[1] = ''.join(new_rights) or '-'
+        rights = state.rights
+        void_set = _VOID_RIGHTS.get(start, '') + _VOID_RIGHTS.get(end, '')
+        if void_set:
+            rights = ''.join(r for r in rights if r not in void_set) or '-'
 
-        # set en passant target square when a pawn advances two spaces
-        if piece.lower() == 'p' and abs(start - end) == 16:
-            fields[2] = Game.i2xy((start + end) // 2)
+        # record the move in the game history and apply it to the board
+        # with the handler for the type of piece, which also returns the
+        # new en passant target square
+        self.move_history.append(move)
+        en_passant = Game._APPLY_MOVE[piece](self, move, start, end, piece)
 
         # reset the half move counter when a pawn moves or is captured
-        fields[3] = self.state.ply + 1
-        if piece.lower() == 'p' or target.lower() != ' ':
-            fields[3] = 0
+        ply = state.ply + 1
+        if target != ' ' or piece in 'Pp':
+            ply = 0
 
         # Increment the turn counter when the next move is from white, i.e.,
-        # the current player is black
-        fields[4] = self.state.turn
-        if self.state.player == 'b':
-            fields[4] = self.state.turn + 1
+        # the current player is black; state update must happen after
+        # castling
+        if state.player == 'w':
+            self._apply_state('b', rights, en_passant, ply, state.turn)
+        else:
+            self._apply_state('w', rights, en_passant, ply, state.turn + 1)
+
+    def _apply_piece_move(self, move, start, end, piece):
+        """
+        Apply the move of a queen, rook, bishop, or knight to the board, and
+        return the en passant target square ('-', as there is none).
+        """
+        self.board.move_piece(start, end, piece)
+        return '-'
+
+    def _apply_king_move(self, move, start, end, piece):
+        """
+        Apply the move of a king to the board, moving the rook to the other
+        side of the king in case of castling, and return the en passant target
+        square ('-').
+        """
+        self.board.move_piece(start, end, piece)
+        castling = _CASTLING_ROOK.get(end)
+        if castling and castling[0] == piece and castling[1] in self.state.rights:
+            r_start, r_end = castling[2], castling[3]
+            self.board.move_piece(r_start, r_end, self.board.get_piece(r_start))
+        return '-'
 
+    def _apply_pawn_move(self, move, start, end, piece):
+        """
+        Apply the move of a pawn to the board, including promotion and the
+        capture of a pawn en passant, and return the en passant target square
+        (set when a pawn advances two spaces).
+        """
         # check for pawn promotion
         if len(move) == 5:
-            piece = move[4]
-            if self.state.player == 'w':
-                piece = piece.upper()
-
-        # record the move in the game history and apply it to the board
-        self.move_history.append(move)
+            self.board.move_piece(start, end, move[4].upper() if piece == 'P' else move[4])
+            return '-'
         self.board.move_piece(start, end, piece)
 
-        # move the rook to the other side of the king in case of castling
-        c_type = {62: 'K', 58: 'Q', 6: 'k', 2: 'q'}.get(end, None)
-        if piece.lower() == 'k' and c_type and c_type in self.state.rights:
-            coords = {'K': (63, 61), 'Q': (56, 59),
-                      'k': (7, 5), 'q': (0, 3)}[c_type]
-            r_piece = self.board.get_piece(coords[0])
-            self.board.move_piece(coords[0], coords[1], r_piece)
-
         # in en passant remove the piece that is captured
-        if piece.lower() == 'p' and self.state.en_passant != '-' \
-                and Game.xy2i(self.state.en_passant) == end:
-            ep_tgt = Game.xy2i(self.state.en_passant)
-            if ep_tgt < 24:
-                self.board.move_piece(end + 8, end + 8, ' ')
-            elif ep_tgt > 32:
-                self.board.move_piece(end - 8, end - 8, ' ')
-
-        # state update must happen after castling
-        self.set_fen(' '.join(str(x) for x in [self.board] + list(fields)))
-
-        # clear the move cache
+        en_passant = self.state.en_passant
+        if en_passant != '-' and _XY2I[en_passant] == end:
+            captured = end + 8 if end < 24 else end - 8
+            self.board.move_piece(captured, captured, ' ')
+
+        if abs(start - end) == 16:
+            return _I2XY[(start + end) // 2]
+        return '-'
+
+    # The handler that applies a move to the board for each piece symbol
+    _APPLY_MOVE = {'K': _apply_king_move, 'P': _apply_pawn_move,
+                   'Q': _apply_piece_move, 'R': _apply_piece_move,
+                   'B': _apply_piece_move, 'N': _apply_piece_move}
+    _APPLY_MOVE.update({piece.lower(): handler
+                        for piece, handler in _APPLY_MOVE.items()})
+    _APPLY_MOVE[' '] = _apply_piece_move
+
+    def _apply_state(self, player, rights, en_passant, ply, turn):
+        """
+        Store the state that follows a move which has already been applied
+        to the board, and record the new position in the game history. This
+        is equivalent to calling set_fen with the new FEN string, without
+        parsing the board back from it.
+        """
+        self.state = State(player, rights, en_passant, ply, turn)
+        # clear the cached moves and status
         self.moves = None
+        self._status = None
+        if self.track_history:
+            # record the FEN fields; fen_history formats them when requested
+            self._history.append((str(self.board), player, rights,
+                                  en_passant, ply, turn))
+            self._count_position()
 
     def get_moves(self, player=None, idx_list=range(64)): 
         """
@@ -228,187 +396,251 @@ class Game(object):
         idx_list. By default, it compiles the list for the active player
         (i.e., self.state.player) by filtering the list of _all_moves() to
         eliminate any that would expose the player's king to check.
+
+        The moves of the active player for the whole board are stored in the
+        moves property until the game changes (and requests for the moves of
+        some of the active player's pieces are filtered from them). They are
+        also cached by position (up to moves_cache_size positions), so they
+        are only generated once for a position that is repeated in this or any
+        other game.
         """
+        if (player or self.state.player) != self.state.player:
+            return self._all_moves(player=player, idx_list=idx_list)
+        if idx_list != range(64):
+            if self.moves is None:
+                return self._all_moves(idx_list=idx_list)
+            idx_mask = _index_mask(idx_list)
+            return [move for move in self.moves if idx_mask >> _XY2I[move[:2]] & 1]
         if self.moves is None:
-            self.moves = self._all_moves(player=player, idx_list=idx_list)
+            cache_size = self.moves_cache_size
+            if cache_size <= 0:
+                self.moves = self._all_moves()
+                return self.moves
+            key = (self.board.zkey, self.state.player, self.state.rights,
+                   self.state.en_passant)
+            moves = _MOVES_CACHE.get(key)
+            if moves is None:
+                moves = tuple(self._all_moves())
+                while len(_MOVES_CACHE) >= cache_size:
+                    _MOVES_CACHE.popitem(last=False)
+                _MOVES_CACHE[key] = moves
+            else:
+                _MOVES_CACHE.move_to_end(key)
+            self.moves = list(moves)
         return self.moves
 
+    @staticmethod
+    def clear_moves_cache():
+        """
+        Discard the moves of all positions cached by get_moves, releasing
+        their memory. Set Game.moves_cache_size to 0 to stop caching moves.
+        """
+        _MOVES_CACHE.clear()
+
     def _all_moves(self, player=None, idx_list=range(64)):
         """
         Get a list containing all reachable moves for pieces owned by the
         specified player that are located at positions included in the idx_list. By
         default, it compiles the list for the active player (i.e.,
         self.state.player) by checking every square on the board.
+
+        The squares that a piece can move to are looked up in the bitboard
+        tables (see the bitboard module) and then filtered with bitmasks: the
+        player's own pieces, and, when the king is in check or the piece is
+        pinned, the squares that are not on the path of the attack. Moves are
+        in simple algebraic notation, e.g., 'a2a4', 'g7h8q', etc.
         """
 
         player = player or self.state.player
+        idx_mask = _index_mask(idx_list)
+        board = self.board
+        bb = board.bb
         res_moves = []
 
-        my_piece_starts_and_types = []
-        for start in idx_list:
-            piece = self.board.get_piece(start)
-            if piece == ' ': 
-                continue
-            if player == 'w' and piece.islower():
-                continue
-            if player == 'b' and piece.isupper():
-                continue
-            if piece.lower() == 'k':
-                my_piece_starts_and_types.insert(0, [start, piece]) # put king at the front of the list
-            else:
-                my_piece_starts_and_types.append([start, piece])
-
-        king_attack_data = square_attacked(self.board, 
-                                           my_piece_starts_and_types[0][0], # king index
-                                           player, get_details=True)
-        king_attack_list = king_attack_data['attack_info']
-        pins_list = king_attack_data['pins_info']
-        pinned_indices = {pin[0] for pin in pins_list}
-        attack_path = {i for attack in king_attack_list for i in attack[1]}
-
-        if len(king_attack_list) > 1: # double check
-            my_piece_starts_and_types = [my_piece_starts_and_types[0]] # only the king can move
-        elif len(king_attack_list) == 1: # single check
+        # iterate the set bits of the bitboard of each type of the player's
+        # pieces (so the type is known without reading the square), putting
+        # the king at the front of the list
+        k_sym = 'K' if player == 'w' else 'k'
+        king = board.king_sq[0 if player == 'w' else 1]
+        my_piece_starts_and_types = [[king, k_sym]] if idx_mask >> king & 1 else []
+        for piece in _PLAYER_PIECES[player]:
+            pieces = bb[PIECE_INDEX[piece]] & idx_mask
+            while pieces:
+                bit = pieces & -pieces
+                pieces ^= bit
+                my_piece_starts_and_types.append([bit.bit_length() - 1, piece])
+
+        occupied = bb[WHITE] | bb[BLACK]
+        # bitmask of the pieces that attack the king, and of the squares on
+        # the paths of the attacks (including the attacking pieces)
+        checkers = attackers_to(bb, king, player, occupied)
+        attack_mask = checkers
+        attackers = checkers
+        while attackers:
+            bit = attackers & -attackers
+            attackers ^= bit
+            attack_mask |= BETWEEN[king][bit.bit_length() - 1]
+
+        # a piece is pinned when it is the only piece between the king and an
+        # opponent piece that would otherwise attack the king along a rank,
+        # file, or diagonal; it may then only move along that line. Keep the
+        # bitmask of the indices of pinned pieces, and the bitmask of the
+        # squares each pinned piece may move to (keyed by its index).
+        q, r, b = _SLIDER_INDICES[player]
+        snipers = (rook_attacks(king, 0) & (bb[q] | bb[r]) |
+                   bishop_attacks(king, 0) & (bb[q] | bb[b]))
+        friendly = bb[OCCUPANCY[player]]
+        pinned_mask = 0
+        pins_by_sq = {}
+        while snipers:
+            bit = snipers & -snipers
+            snipers ^= bit
+            sniper = bit.bit_length() - 1
+            blockers = BETWEEN[king][sniper] & occupied
+            if blockers & friendly and not blockers & (blockers - 1):
+                pinned_mask |= blockers
+                pins_by_sq[blockers.bit_length() - 1] = LINE[king][sniper]
+
+        if checkers & (checkers - 1): # double check
+            my_piece_starts_and_types = my_piece_starts_and_types[:1] if idx_mask >> king & 1 else [] # only the king can move
+        elif checkers: # single check
             # don't create moves for pinned pieces
-            my_piece_starts_and_types = [piece for piece in my_piece_starts_and_types if piece[0] not in pinned_indices]
+            my_piece_starts_and_types = [piece for piece in my_piece_starts_and_types if not pinned_mask >> piece[0] & 1]
 
+        # squares that are not occupied by the player's pieces and, if the
+        # king is in check, that block or capture the attacking piece
+        targets_mask = ~friendly & (attack_mask or _ALL_SQUARES)
         for [start, piece] in my_piece_starts_and_types:
 
-            # MOVES contains the list of all possible moves for a piece of
-            # the specified type on an empty chess board.
-            rays = MOVES.get(piece)
-
-            # handle pinned pieces
-            if start in pinned_indices:
-                pin_data = next(pin for pin in pins_list if pin[0] == start)
-                allowed_move_indices = pin_data[1] # these are the squares where the pinned piece can move (the index of the pinning piece and the indices along the ray of its attack toward the king)
-                for ray in rays[start]:
-                    # remove any values that are not in allowed_move_indices
-                    ray = [i for i in ray if i in allowed_move_indices]
-                    new_moves = self._trace_ray(start, piece, ray, player, king_attack_list, attack_path)
-                    res_moves.extend(new_moves)
-            else: # not pinned piece
-                for ray in rays[start]:
-                    # Trace each of the 8 (or fewer) possible directions that a
-                    # piece at the given starting index could move
-                    new_moves = self._trace_ray(start, piece, ray, player, king_attack_list, attack_path)
-                    res_moves.extend(new_moves)
+            if piece == k_sym:
+                self._king_moves(start, player, res_moves, checkers)
+                continue
+
+            # a pinned piece may only move to the squares along the line of
+            # the attack that pins it (including the index of the pinning
+            # piece); other pieces may move anywhere
+            allowed_mask = pins_by_sq.get(start, _ALL_SQUARES)
+
+            # the set bits of targets are read off inline (rather than with
+            # bitboard.lsb) as this is the innermost loop of move generation
+            move_str = _MOVE_STR[start]
+            piece_attacks = _PIECE_ATTACKS.get(piece)
+            if piece_attacks:
+                targets = piece_attacks(start, occupied) & targets_mask & allowed_mask
+                while targets:
+                    bit = targets & -targets
+                    targets ^= bit
+                    res_moves.append(move_str[bit.bit_length() - 1])
+                continue
+
+            targets = self._pawn_targets(start, player, occupied) & targets_mask & allowed_mask
+            while targets:
+                bit = targets & -targets
+                targets ^= bit
+                end = bit.bit_length() - 1
+                if end < 8 or end > 55:
+                    # Pawn promotions need to list all possible promotions
+                    move = move_str[end]
+                    res_moves.append(move + 'b')
+                    res_moves.append(move + 'n')
+                    res_moves.append(move + 'r')
+                    res_moves.append(move + 'q')
+                else:
+                    res_moves.append(move_str[end])
 
         return res_moves
-    
-    def _trace_ray(self, start, piece, ray, player, king_attack_list=None, attack_path=None):
-        """
-        Return a list of moves by filtering the supplied ray (a list of
-        indices corresponding to end points that lie on a common line from
-        the starting index) based on the state of the chess board (e.g.,
-        castling, capturing, en passant, etc.). Moves are in simple algebraic
-        notation, e.g., 'a2a4', 'g7h8q', etc.
 
-        Each ray should be an element from Chessir.MOVES, representing all
-        the moves that a piece could make from the starting square on an
-        otherwise blank chessboard. This function filters the moves in a ray
-        by enforcing the rules of chess for the legality of capturing pieces,
-        castling, en passant, and pawn promotion.
+    def _pawn_targets(self, start, player, occupied):
         """
-        res_moves = []
-
-        for end in ray:
-            sym = piece.lower()
-            del_x = abs(end - start) % 8
-            move = [Game.i2xy(start) + Game.i2xy(end)]
-            tgt_owner = self.board.get_owner(end)
-
-            # Abort if the current player owns the piece at the end point
-            if tgt_owner == player:
-                break
-
-            # Abort king moves that would put it in check
-            if sym == 'k':
-                new_board = copy.deepcopy(self.board)
-                new_board.move_piece(start, end, piece)
-                if square_attacked(new_board, end, player=player)['attacked']:
-                    break
-
-            # Test castling of king
-            if sym == 'k' and del_x == 2:
-                if king_attack_list:
-                    # No castling if king is currently in check
-                    break 
-                gap_owner = self.board.get_owner((start + end) // 2)
-                out_owner = self.board.get_owner(end - 1)
-                rights = {62: 'K', 58: 'Q', 6: 'k', 2: 'q'}.get(end, ' ')
-                if (tgt_owner or gap_owner or rights not in self.state.rights or
-                        (rights.lower() == 'q' and out_owner)):
-                    # Abort castling because missing castling rights
-                    # or piece in the way
-                    break
-                # Castling not allowed if path square is attacked
-                if square_attacked(self.board, (start + end) // 2, player=player)['attacked']:
-                    break
-
-            if sym == 'p':
-                # Pawns cannot move forward to an occupied square
-                if del_x == 0 and tgt_owner:
-                    break
-
-                # Test en passant exception for pawn
-                elif del_x != 0 and not tgt_owner:
-                    ep_coords = self.state.en_passant
-                    if ep_coords == '-' or end != Game.xy2i(ep_coords):
-                        break
-
-                # Pawn promotions need to list all possible promotions
-                if (end < 8 or end > 55):
-                    move = [move[0] + s for s in ['b', 'n', 'r', 'q']]            
-
-            # When king is in check other pieces can only move to block or capture checking piece
-            if attack_path and piece.lower() != 'k': 
-                if end not in attack_path:
-                    # Empty the move list if the piece cannot block or capture the checking piece, but don't break because the tgt_owner check below is needed to stop searching along the ray
-                    move = [] 
-
-            res_moves.extend(move)
-
-            # break ray search when an opponent piece is encountered
-            if tgt_owner:
-
-                break
+        Return a bitmask of the squares that a pawn of the player at the
+        starting index can move to (forward to an empty square, or diagonally
+        to capture an opponent piece, including en passant), before the
+        masks for check and pins are applied.
+        """
+        if not 8 <= start < 56:
+            return 0 # pawns never stand on the first or last rank
+        step = -8 if player == 'w' else 8
+        capture_mask = self.board.bb[BLACK if player == 'w' else WHITE]
+        if self.state.en_passant != '-':
+            capture_mask |= 1 << _XY2I[self.state.en_passant]
+        targets = PAWN_ATTACKS[player][start] & capture_mask
+
+        # a pawn moves two squares from its starting rank when neither
+        # square in front of it is occupied
+        end = start + step
+        if not occupied >> end & 1:
+            targets |= 1 << end
+            if (start > 47 if player == 'w' else start < 16) and not occupied >> (end + step) & 1:
+                targets |= 1 << (end + step)
+        return targets
+
+    def _king_moves(self, start, player, res_moves, checkers=0):
+        """
+        Append the legal moves of the king at the starting index to the
+        res_moves list, including castling. The king cannot move to a square
+        that is attacked; this is tested with the occupancy of the board
+        without the king (so that a sliding piece attacks through the square
+        the king leaves) rather than by making each move on the board.
+        """
+        bb = self.board.bb
+        move_str = _MOVE_STR[start]
+        occupied = (bb[WHITE] | bb[BLACK]) & ~(1 << start)
+        targets = KING_ATTACKS[start] & ~bb[OCCUPANCY[player]]
+        while targets:
+            bit = targets & -targets
+            targets ^= bit
+            end = bit.bit_length() - 1
+            if not is_attacked(bb, end, player, occupied):
+                res_moves.append(move_str[end])
+
+        # No castling if king is currently in check
+        if checkers:
+            return
+        for home, end, rights, empty_mask in _CASTLING[player]:
+            # Abort castling because missing castling rights, piece in the
+            # way, or path or end square attacked
+            if (start != home or rights not in self.state.rights or
+                    occupied & empty_mask or
+                    is_attacked(bb, (start + end) // 2, player, occupied) or
+                    is_attacked(bb, end, player, occupied)):
+                continue
+            res_moves.append(move_str[end])
 
-        return res_moves
-    
     @property
     def status(self):
+        """
+        The status of the game (NORMAL, CHECK, CHECKMATE, STALEMATE, or DRAW)
+        for the active player; it is stored until the game changes.
 
-        k_sym, opp = {'w': ('K', 'b'), 'b': ('k', 'w')}.get(self.state.player)
-        k_loc = Game.i2xy(self.board.find_piece(k_sym))
-        can_move = len(self.get_moves())
-        is_exposed = [m[2:4] for m in self._all_moves(player=opp)
-                      if m[2:4] == k_loc]
-        ply = self.state.ply
-        material_count = Counter(self.get_material_string())
-        three_fold = max(self.positions_count.values()) >= 3
-
-
-        status = Game.NORMAL
-        if is_exposed:
+        The status is found from signals that are already kept up to date:
+        the (cached) legal moves, a bitboard test of whether the king is
+        attacked, the half move counter, the greatest number of times any
+        position has occurred, and the piece bitboards.
+        """
+        if self._status is not None:
+            return self._status
+
+        bb = self.board.bb
+        player = self.state.player
+        king = self.board.king_sq[0 if player == 'w' else 1]
+        in_check = is_attacked(bb, king, player)
+
+        if self._repetitions >= 3: # threefold repetition
+            status = Game.DRAW
+        elif not self.get_moves():
+            status = Game.CHECKMATE if in_check else Game.STALEMATE
+        elif in_check:
             status = Game.CHECK
-            if not can_move:
-                status = Game.CHECKMATE
-        elif not can_move:
-            status = Game.STALEMATE
-        
-        if status == Game.NORMAL: # check for other draw conditions
-            if ply >= 100:
-                status = Game.DRAW
-            else:
-                # insufficient material
-                # check for pieces other than kings, knights, and bishops
-                if not set(material_count) - {'k', 'K', 'n', 'N', 'b', 'B'}:
-                    # check for insufficient bishops and knights
-                    if (material_count['n'] /2 + material_count['b'] <= 1 and material_count['N'] /2 + material_count['B'] <= 1):
-                        status = Game.DRAW
-
-        if three_fold:
-            status = Game.DRAW                        
-
+        elif self.state.ply >= 100:
+            status = Game.DRAW
+        elif (not bb[_P] | bb[_p] | bb[_R] | bb[_r] | bb[_Q] | bb[_q] and
+                popcount(bb[_N]) / 2 + popcount(bb[_B]) <= 1 and
+                popcount(bb[_n]) / 2 + popcount(bb[_b]) <= 1):
+            # insufficient material: only kings, and at most one bishop or
+            # two knights for each player
+            status = Game.DRAW
+        else:
+            status = Game.NORMAL
+
+        self._status = status
         return status
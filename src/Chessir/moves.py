@@ -145,7 +145,7 @@ And, generalizing:
 
 RAYS_FROM_TARGET[<color>][<piece>][<starting index>][<direction>] = [list of moves]
 
-The square_attacked method of Game uses RAYS_FROM_TARGET to search out from a target square until a piece is encountered. If, for example, the encountered piece is of the same type as the piece for the current ray, that encountered piece is attacking the target square.
+Searching out from a target square along these rays until a piece is encountered shows whether the square is attacked: if, for example, the encountered piece is of the same type as the piece for the current ray, that encountered piece is attacking the target square. The square_attacked function performs the same search using the equivalent bitboard tables in the bitboard module.
 """
 
 # Create separate dictionaries for each color
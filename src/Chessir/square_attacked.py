@@ -1,54 +1,135 @@
-from .moves import RAYS_FROM_TARGET
+from .bitboard import (PIECE_INDEX, WHITE, BLACK, OCCUPANCY, KING_ATTACKS,
+                       KNIGHT_ATTACKS, PAWN_ATTACKS, RAY_MASKS, RAY_SQUARES,
+                       STEPS, POSITIVE_DIRECTIONS, ORTHOGONAL_DIRECTIONS,
+                       DIAGONAL_DIRECTIONS, ROOK_ATTACKS, ROOK_MASKS,
+                       BISHOP_ATTACKS, BISHOP_MASKS, lsb, msb)
 
 """
 The square_attacked function determines whether a given square is attacked by an opponent's piece.
 
 If the get_details parameter is set to True, it will return 1) the indices of attacking pieces and their ray of attack and 2) the indices of pinned pieces and the indices to which they can move without exposing the given square.
 
-Please note this function does not have the capability to determine whether a pawn can be attacked by an en passant move by the opponent.
+When details are not needed, square_attacked defers to is_attacked, which answers the question directly from a list of bitboards (`Board.bb`) with a few table lookups and bitwise operations. attackers_to returns the bitboard of all the attacking pieces in the same way, so that they can be counted (e.g., to find a double check) with bitboard.popcount.
+
+Attacks are found with the bitboards of the board (see the bitboard module): a piece attacks the square if its bitboard intersects the squares that a piece of the same type would attack from the square. For pawns, knights, and kings these come from precomputed tables; for sliding pieces they are looked up for the current occupancy of the board. Queens are not checked separately: they are included with the rooks when checking orthogonal rays and with the bishops when checking diagonal rays. Pins are found by searching out along each orthogonal and diagonal ray for a friendly piece followed by an attacking piece that moves along that ray.
 
-There's an opportunity to make this faster: rook and bishop checks could cover queen, because queen attacks along those rays, thus negating the need to separately check queen attack rays
+Please note this function does not have the capability to determine whether a pawn can be attacked by an en passant move by the opponent.
 """
 
+# The types of pieces from which we are checking for attacks, by the color
+# of the player whose square may be attacked
+ATTACKING_PIECES = {'w': 'kqrbnp', 'b': 'KQRBNP'}
+
+# Indices in Board.bb of the king, queen, rook, bishop, knight, and pawn
+# bitboards of the attacking pieces
+ATTACKING_INDICES = {player: tuple(PIECE_INDEX[piece] for piece in pieces)
+                     for player, pieces in ATTACKING_PIECES.items()}
+
+
+def _nearest(blockers, direction):
+    """Return the index of the blocker nearest the start of a ray."""
+    if direction in POSITIVE_DIRECTIONS:
+        return lsb(blockers)
+    return msb(blockers)
+
+
+def _ray_to(square_index, end, direction):
+    """Return the indices along a ray from square_index up to and including end."""
+    return list(RAY_SQUARES[square_index * 8 + direction][:(end - square_index) // STEPS[direction]])
+
+
+def _attack_ray(square_index, end):
+    """Return the indices along which the piece at end attacks square_index."""
+    for direction in range(8):
+        if RAY_MASKS[square_index * 8 + direction] >> end & 1:
+            return _ray_to(square_index, end, direction)
+    return [end] # knights do not attack along a ray
+
+
+def is_attacked(bb, square_index, player='w', occupied=None):
+    """
+    Return True if square_index is attacked by an opponent of player, given
+    the list of bitboards of a board. The occupancy of the board (which
+    blocks sliding pieces) can be given, e.g., without a king that is about
+    to move; otherwise it is taken from the bitboards.
+
+    The pieces that do not slide (pawns, knights, and king) are checked
+    first, since each needs only a single table lookup; the sliding pieces
+    are only looked up (with the occupancy of the board) if none of them
+    attack the square.
+    """
+    k, q, r, b, n, p = ATTACKING_INDICES[player]
+    if (PAWN_ATTACKS[player][square_index] & bb[p] or
+            KNIGHT_ATTACKS[square_index] & bb[n] or
+            KING_ATTACKS[square_index] & bb[k]):
+        return True
+    if occupied is None:
+        occupied = bb[WHITE] | bb[BLACK]
+    return bool(BISHOP_ATTACKS[square_index][occupied & BISHOP_MASKS[square_index]] & (bb[q] | bb[b]) or
+                ROOK_ATTACKS[square_index][occupied & ROOK_MASKS[square_index]] & (bb[q] | bb[r]))
+
+
+def attackers_to(bb, square_index, player='w', occupied=None):
+    """
+    Return the bitboard of the opponent pieces of player that attack
+    square_index, given the list of bitboards of a board (and optionally the
+    occupancy of the board; see is_attacked). The number of attackers is
+    popcount(attackers_to(...)), e.g., 2 for a double check.
+    """
+    k, q, r, b, n, p = ATTACKING_INDICES[player]
+    if occupied is None:
+        occupied = bb[WHITE] | bb[BLACK]
+    return (PAWN_ATTACKS[player][square_index] & bb[p] |
+            KNIGHT_ATTACKS[square_index] & bb[n] |
+            KING_ATTACKS[square_index] & bb[k] |
+            BISHOP_ATTACKS[square_index][occupied & BISHOP_MASKS[square_index]] & (bb[q] | bb[b]) |
+            ROOK_ATTACKS[square_index][occupied & ROOK_MASKS[square_index]] & (bb[q] | bb[r]))
+
+
 def square_attacked(board, square_index, player='w', get_details=False):
 
+    if not get_details:
+        return {'attacked': is_attacked(board.bb, square_index, player),
+                'attack_info': [], 'pins_info': []}
+
     res = {
         'attacked': False,
         'attack_info': [], # elements will be [attacking_piece_index, [attacking_ray_indices]]
         'pins_info': [] # elements will be [pinned_piece_index, [allowed_move_indices]]
         }
 
-    # list the types of pieces from which we are checking for attacks
-    pieces = list(RAYS_FROM_TARGET[player].keys())
-
-    for piece in pieces:
-        rays_list = RAYS_FROM_TARGET[player].get(piece)[square_index] 
-        for ray in rays_list: # go through the rays for that piece at that square
-            for i in range(len(ray)): # proceed outward along the ray
-                end = ray[i]
-                end_piece = board.get_piece(end)
-                if end_piece == ' ': 
-                    continue # if there's no piece at end, go to next index in ray
-                else: # there is a piece at end
-                    if end_piece == piece: # end_piece can attack on this ray, so square_index is attacked
-                        res['attacked'] = True
-                        if not get_details:
-                            return res
-                        res['attack_info'].append([end, ray[:i+1]])
-                        break # attacking piece was found; don't need to continue along the ray
-                    if (player == 'w' and end_piece.isupper()) or (player == 'b' and end_piece.islower()):
-                        # this is a friendly and possibly pinned piece, continue along the ray and see whether there is an opponent piece that matches piece
-                        pin_index = end
-                        while (i + 1) < len(ray):
-                            i += 1
-                            end = ray[i]
-                            end_piece = board.get_piece(end)
-                            if end_piece == ' ':
-                                continue
-                            else: # not an empty square
-                                if end_piece == piece:
-                                    res['pins_info'].append([pin_index, ray[:i+1]]) # this is the index of the pinned piece and the indices it can move to
-                                break # break the while loop because a piece was encountered; no need to continue along the ray
-                    break # break the for i loop which is checking outward along the ray -- this is the case where end_piece belongs to the opponent but its type does not match piece; therefore no need to continue along the ray
-    
+    bb = board.bb
+    occupied = bb[WHITE] | bb[BLACK]
+    friendly = bb[OCCUPANCY[player]]
+    rays = square_index * 8 # offset of the rays from square_index in RAY_MASKS
+
+    q, r, b = ATTACKING_INDICES[player][1:4]
+    orthogonal = bb[q] | bb[r] # pieces that attack along orthogonal rays
+    diagonal = bb[q] | bb[b] # pieces that attack along diagonal rays
+
+    attackers = attackers_to(bb, square_index, player, occupied)
+    if attackers:
+        res['attacked'] = True
+        while attackers:
+            end = lsb(attackers)
+            attackers ^= 1 << end
+            res['attack_info'].append([end, _attack_ray(square_index, end)])
+
+    for sliders, directions in ((orthogonal, ORTHOGONAL_DIRECTIONS),
+                                (diagonal, DIAGONAL_DIRECTIONS)):
+        if not sliders:
+            continue # there are no pieces that attack along these rays
+        for direction in directions:
+            blockers = RAY_MASKS[rays + direction] & occupied
+            if not blockers:
+                continue # the ray is empty
+            end = _nearest(blockers, direction)
+            if friendly >> end & 1:
+                # this is a friendly and possibly pinned piece, see whether the next piece along the ray can attack along it
+                blockers ^= 1 << end
+                if blockers:
+                    pinner = _nearest(blockers, direction)
+                    if sliders >> pinner & 1:
+                        res['pins_info'].append([end, _ray_to(square_index, pinner, direction)]) # this is the index of the pinned piece and the indices it can move to
+
     return res
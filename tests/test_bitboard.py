@@ -0,0 +1,64 @@
+import unittest
+
+from src.Chessir.bitboard import (BETWEEN, LINE, KING_ATTACKS, KNIGHT_ATTACKS, PAWN_ATTACKS,
+                                  RAY_MASKS, RAY_SQUARES, N, E, SW, lsb, msb, popcount,
+                                  rook_attacks, bishop_attacks, queen_attacks)
+
+
+def squares(bb):
+    return {i for i in range(64) if bb >> i & 1}
+
+
+class BitboardTest(unittest.TestCase):
+
+    def test_lsb_msb(self):
+        self.assertEqual(lsb(1 << 5 | 1 << 40), 5)
+        self.assertEqual(msb(1 << 5 | 1 << 40), 40)
+
+    def test_popcount(self):
+        self.assertEqual(popcount(0), 0)
+        self.assertEqual(popcount(1 << 5 | 1 << 40 | 1 << 63), 3)
+
+    def test_step_attacks(self):
+        # knight on b1 attacks a3, c3, and d2
+        self.assertEqual(squares(KNIGHT_ATTACKS[57]), {40, 42, 51})
+        # king on a8 attacks b8, a7, and b7
+        self.assertEqual(squares(KING_ATTACKS[0]), {1, 8, 9})
+        # white pawn on e2 attacks d3 and f3; black pawn on a7 attacks b6
+        self.assertEqual(squares(PAWN_ATTACKS['w'][52]), {43, 45})
+        self.assertEqual(squares(PAWN_ATTACKS['b'][8]), {17})
+
+    def test_rays(self):
+        for direction in range(8):
+            for idx in range(64):
+                ray = RAY_SQUARES[idx * 8 + direction]
+                self.assertEqual(squares(RAY_MASKS[idx * 8 + direction]), set(ray))
+                self.assertEqual(list(ray), sorted(ray, key=lambda x: abs(x - idx)))
+        self.assertEqual(RAY_SQUARES[60 * 8 + N], (52, 44, 36, 28, 20, 12, 4))
+        self.assertEqual(RAY_SQUARES[7 * 8 + E], ())
+        self.assertEqual(RAY_SQUARES[7 * 8 + SW], (14, 21, 28, 35, 42, 49, 56))
+
+    def test_between_and_line(self):
+        # e1 and e8 share the e file
+        self.assertEqual(squares(BETWEEN[60][4]), {12, 20, 28, 36, 44, 52})
+        self.assertEqual(BETWEEN[4][60], BETWEEN[60][4])
+        self.assertEqual(squares(LINE[60][4]), {4, 12, 20, 28, 36, 44, 52, 60})
+        # adjacent squares have nothing between them, a1 and h8 share a diagonal
+        self.assertEqual(BETWEEN[0][1], 0)
+        self.assertEqual(squares(LINE[56][7]), {56, 49, 42, 35, 28, 21, 14, 7})
+        # b1 and c3 are not aligned
+        self.assertEqual(BETWEEN[57][42], 0)
+        self.assertEqual(LINE[57][42], 0)
+
+    def test_slider_attacks(self):
+        # rook on d4 blocked by pieces on d6 and f4
+        occupied = 1 << 35 | 1 << 19 | 1 << 37
+        self.assertEqual(squares(rook_attacks(35, occupied)),
+                         {27, 19, 36, 37, 34, 33, 32, 43, 51, 59})
+        # bishop on a1 blocked by a piece on c3
+        self.assertEqual(squares(bishop_attacks(56, 1 << 56 | 1 << 42)), {49, 42})
+        for idx in range(64):
+            self.assertEqual(queen_attacks(idx, 0),
+                             rook_attacks(idx, 0) | bishop_attacks(idx, 0))
+            self.assertEqual(queen_attacks(idx, 0),
+                             sum(RAY_MASKS[idx * 8 + d] for d in range(8)))
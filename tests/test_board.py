@@ -1,5 +1,8 @@
 
+import copy
+
 from src.Chessir.board import Board
+from src.Chessir.bitboard import PIECE_INDEX, WHITE, BLACK
 import unittest
 
 
@@ -25,3 +28,57 @@ class BoardTest(unittest.TestCase):
         self.board.move_piece(52, 36, 'P')  # e2e4
         self.assertEqual(str(self.board),
                          'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR')
+
+    def test_str_after_moves(self):
+        self.board.set_position('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR')
+        str(self.board)
+        self.board.move_piece(52, 36, 'P')  # e2e4
+        self.assertEqual(str(self.board),
+                         'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR')
+        self.board.move_piece(11, 36, 'q')  # d7 captures e4
+        self.assertEqual(str(self.board),
+                         'rnbqkbnr/ppp1pppp/8/8/4q3/8/PPPP1PPP/RNBQKBNR')
+
+    def test_bitboards(self):
+        self.board.set_position('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR')
+        self.assertEqual(self.board.bb[WHITE], 0xFFFF << 48)
+        self.assertEqual(self.board.bb[BLACK], 0xFFFF)
+        self.board.move_piece(52, 36, 'P')  # e2e4
+        self.board.move_piece(11, 36, 'q')  # d7 captures e4
+        self.assertEqual(self.board.bb[PIECE_INDEX['q']], 1 << 3 | 1 << 36)
+        self.assertFalse(self.board.bb[PIECE_INDEX['P']] >> 36 & 1)
+        self.assertFalse(self.board.bb[WHITE] >> 36 & 1)
+        self.assertFalse(self.board.bb[BLACK] >> 11 & 1)
+
+    def test_zkey(self):
+        self.board.set_position('rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR')
+        self.board.move_piece(52, 36, 'P')  # e2e4
+        self.board.move_piece(11, 36, 'q')  # d7 captures e4
+        self.assertEqual(self.board.zkey,
+                         Board('rnbqkbnr/ppp1pppp/8/8/4q3/8/PPPP1PPP/RNBQKBNR').zkey)
+        self.assertNotEqual(self.board.zkey, Board().zkey)
+
+    def test_clone(self):
+        for board in (self.board.clone(), copy.deepcopy(self.board)):
+            board.move_piece(52, 36, 'P')  # e2e4
+            self.assertEqual(str(board),
+                             'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR')
+            self.assertEqual(str(self.board),
+                             'rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR')
+            self.assertNotEqual(board.bb, self.board.bb)
+            self.assertNotEqual(board.zkey, self.board.zkey)
+
+    def test_king_sq(self):
+        self.board.set_position('r3k2r/8/8/8/8/8/8/R3K2R')
+        self.assertEqual(self.board.king_sq, [60, 4])
+        self.board.move_piece(60, 62, 'K')  # e1g1
+        self.board.move_piece(4, 3, 'k')  # e8d8
+        self.assertEqual(self.board.king_sq, [62, 3])
+
+    def test_clear_caches(self):
+        position = 'r3k2r/8/8/8/8/8/8/R3K2R'
+        self.board.set_position(position)
+        Board.clear_caches()
+        board = Board(position)
+        self.assertEqual(str(board), position)
+        self.assertEqual(board.bb, self.board.bb)
@@ -13,8 +13,8 @@ LEGAL_OPENINGS = ['a2a3', 'a2a4', 'b1a3', 'b1c3', 'b2b3', 'b2b4', 'c2c3',
                   'g1f3', 'g1h3', 'g2g3', 'g2g4', 'h2h3', 'h2h4']
 
 # set of all board positions in index form and algebraic notation
-ALG_POS = set(chr(l) + str(x) for x in range(1, 9) for l in range(97, 105))
-IDX_POS = set(range(64))
+ALG_POS = frozenset(chr(l) + str(x) for x in range(1, 9) for l in range(97, 105))
+IDX_POS = frozenset(range(64))
 
 
 class GameTest(unittest.TestCase):
@@ -22,6 +22,13 @@ class GameTest(unittest.TestCase):
     def setUp(self):
         self.game = Game()
 
+    def test_slots(self):
+        # Game and Board declare __slots__, so no instance __dict__ is created
+        self.assertFalse(hasattr(self.game, '__dict__'))
+        self.assertFalse(hasattr(self.game.board, '__dict__'))
+        with self.assertRaises(AttributeError):
+            self.game.undeclared = None
+
     def test_i2xy(self):
         for idx in range(64):
             self.assertIn(Game.i2xy(idx), ALG_POS)
@@ -41,6 +48,21 @@ class GameTest(unittest.TestCase):
         hist = [START_POS,
                 'rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1']
         self.assertEqual(self.game.fen_history, hist)
+        # changing the returned list doesn't change the history
+        self.game.fen_history.pop()
+        self.game.apply_move('e7e5')
+        self.assertEqual(self.game.fen_history[:2], hist)
+        self.assertEqual(len(self.game.fen_history), 3)
+        with self.assertRaises(AttributeError):
+            self.game.fen_history = []
+
+    def test_track_history(self):
+        self.game = Game(track_history=False)
+        self.game.apply_move('e2e4')
+        self.assertEqual(self.game.fen_history, [])
+        self.assertEqual(self.game.positions_count, Counter())
+        self.assertEqual(self.game.move_history, ['e2e4'])
+        self.assertEqual(self.game.status, Game.NORMAL)
 
     def test_move_history(self):
         self.game = None
@@ -205,6 +227,15 @@ class GameTest(unittest.TestCase):
         self.game.reset()
         with self.assertRaises(InvalidMove):
             self.game.apply_move('e2e2', validate=True)
+        # invalid move checked against the known moves of the position
+        self.game.get_moves()
+        with self.assertRaises(InvalidMove):
+            self.game.apply_move('e2e5', validate=True)
+        self.game.apply_move('e2e4', validate=True)
+        self.assertEqual(self.game.move_history, ['e2e4'])
+        # squares that are not on the board
+        with self.assertRaises(InvalidMove):
+            self.game.apply_move('e9e4')
 
     def test_status(self):
 
@@ -215,6 +246,9 @@ class GameTest(unittest.TestCase):
         # CHECK
         game = Game(fen='r3rk2/8/8/8/8/8/8/R3K2R w KQ - 0 1')
         self.assertEqual(game.status, game.CHECK)
+        # check by a pinned piece
+        game = Game(fen='1r6/8/5p1p/6R1/k2r2P1/1Q3P2/6BP/1K6 b - - 2 46')
+        self.assertEqual(game.status, Game.CHECK)
 
         # CHECKMATE
         game = Game(fen='8/p5kp/1p6/2p5/P5P1/2n4P/r2p4/1K6 w - - 2 37')
@@ -272,6 +306,43 @@ class GameTest(unittest.TestCase):
         self.game.get_moves()
         self.assertIsNotNone(self.game.moves)
 
+    def test_get_moves_subset(self):
+        # moves of some of the pieces don't replace the moves of the board
+        self.game.reset()
+        self.assertEqual(sorted(self.game.get_moves(idx_list=[57, 52])), ['b1a3', 'b1c3', 'e2e3', 'e2e4'])
+        self.assertIsNone(self.game.moves)
+        self.assertEqual(sorted(self.game.get_moves()), LEGAL_OPENINGS)
+        # and are filtered from them once they are known
+        self.assertEqual(sorted(self.game.get_moves(idx_list=[57, 52])), ['b1a3', 'b1c3', 'e2e3', 'e2e4'])
+        self.assertEqual(sorted(self.game.moves), LEGAL_OPENINGS)
+        # the indices may be any iterable
+        self.game.reset()
+        self.assertEqual(sorted(self.game.get_moves(idx_list=(i for i in [52, 57]))), ['b1a3', 'b1c3', 'e2e3', 'e2e4'])
+        self.game.get_moves()
+        self.assertEqual(sorted(self.game.get_moves(idx_list=(i for i in [52, 57]))), ['b1a3', 'b1c3', 'e2e3', 'e2e4'])
+
+    def test_moves_cache(self):
+        # positions with the same placement but different castling rights or
+        # en passant squares have different moves, whether or not their
+        # moves are cached
+        Game.clear_moves_cache()
+        cache_size = Game.moves_cache_size
+        try:
+            for size in (cache_size, 1, 0):
+                Game.moves_cache_size = size
+                for _ in range(2):
+                    self.assertIn('e1g1', Game('r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1').get_moves())
+                    self.assertNotIn('e1g1', Game('r3k2r/8/8/8/8/8/8/R3K2R w - - 0 1').get_moves())
+                    fen = 'rnbqkbnr/ppp2ppp/4p3/3pP3/8/8/PPPP1PPP/RNBQKBNR w KQkq %s 0 1'
+                    self.assertIn('e5d6', Game(fen % 'd6').get_moves())
+                    self.assertNotIn('e5d6', Game(fen % '-').get_moves())
+                    self.assertEqual(sorted(Game().get_moves()), LEGAL_OPENINGS)
+                Game.clear_moves_cache()
+                self.assertEqual(sorted(Game().get_moves()), LEGAL_OPENINGS)
+        finally:
+            Game.moves_cache_size = cache_size
+            Game.clear_moves_cache()
+
     def test_positions_count_property(self):
         # after reset
         self.game.reset('b2r3r/4Rp1p/pk1q1np1/Np1P4/3p1Q2/P4PPB/1PP4P/1K6 w - - 2 26')
@@ -283,6 +354,21 @@ class GameTest(unittest.TestCase):
         self.game.set_fen('rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR b KQkq e3 0 1')
         self.assertEqual(self.game.positions_count, Counter({'b2r3r/4Rp1p/pk1q1np1/Np1P4/3p1Q2/P4PPB/1PP4P/1K6': 1, 'b2r3r/4Rp1p/pk1q1np1/Np1P4/3Q4/P4PPB/1PP4P/1K6': 1, 'rnbqkbnr/ppp1pppp/8/8/3pP3/8/PPPP1PPP/RNBQKBNR': 1}))
 
+    def test_position_keys(self):
+        self.game.reset()
+        self.assertEqual(self.game.positions_count['rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR'], 1)
+        for move in ['g1f3', 'g8f6', 'f3g1', 'f6g8']:
+            self.game.apply_move(move)
+        self.assertEqual(self.game.position_keys[self.game.board.zkey], 2)
+        self.assertEqual(sorted(self.game.position_keys.values()), [1, 1, 1, 2])
+        self.assertEqual(self.game.positions_count['rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR'], 2)
+        # changing the returned Counter doesn't change the count
+        self.game.positions_count['rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR'] += 1
+        self.assertEqual(self.game.positions_count['rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR'], 2)
+        self.assertEqual(self.game.status, Game.NORMAL)
+        with self.assertRaises(AttributeError):
+            self.game.positions_count = Counter()
+
     def test_get_material_string(self):
         self.game = Game()
         self.assertEqual(Counter(self.game.get_material_string()), Counter('rnbqkbnrppppppppPPPPPPPPRNBQKBNR'))
@@ -0,0 +1,35 @@
+import unittest
+
+from src.Chessir.board import Board
+from src.Chessir.bitboard import WHITE, BLACK, popcount
+from src.Chessir.square_attacked import attackers_to, is_attacked, square_attacked
+
+
+class SquareAttackedTest(unittest.TestCase):
+
+    def test_attackers_to(self):
+        # white king on e1 in double check from the knight on d3 and the rook on e8
+        board = Board('4r1k1/8/8/8/8/3n4/8/4K3')
+        attackers = attackers_to(board.bb, 60, 'w')
+        self.assertEqual(attackers, 1 << 4 | 1 << 43)
+        self.assertEqual(popcount(attackers), 2)
+        self.assertTrue(is_attacked(board.bb, 60, 'w'))
+        # the black king is not attacked
+        self.assertEqual(attackers_to(board.bb, 6, 'b'), 0)
+        self.assertFalse(is_attacked(board.bb, 6, 'b'))
+
+    def test_occupancy(self):
+        # the rook on e8 attacks e1 through the square of the king on e2
+        # once the king is removed from the occupancy
+        board = Board('4r1k1/8/8/8/8/8/4K3/8')
+        occupied = (board.bb[WHITE] | board.bb[BLACK]) & ~(1 << 52)
+        self.assertFalse(is_attacked(board.bb, 60, 'w'))
+        self.assertTrue(is_attacked(board.bb, 60, 'w', occupied))
+        self.assertEqual(attackers_to(board.bb, 60, 'w', occupied), 1 << 4)
+
+    def test_square_attacked_details(self):
+        # the bishop on d2 is pinned by the queen on a5
+        board = Board('4k3/8/8/q7/8/8/3B4/4K3')
+        res = square_attacked(board, 60, 'w', get_details=True)
+        self.assertFalse(res['attacked'])
+        self.assertEqual(res['pins_info'], [[51, [51, 42, 33, 24]]])